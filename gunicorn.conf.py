@@ -0,0 +1,11 @@
+# Gunicorn settings for the prediction API (used by the Procfile)
+bind = '0.0.0.0:5000'
+workers = 4
+ 
+# Import prediction_api, and with it the dataset, once in the master
+preload_app = True
+ 
+def post_worker_init(worker):
+    """Load the model in each worker; TensorFlow is not fork-safe"""
+    import prediction_api
+    prediction_api.init_model()
\ No newline at end of file
@@ -1,38 +1,127 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
-import json
+import hashlib
+import itertools
+import ijson
+import joblib
 import pickle
+import shutil
+import tempfile
+import threading
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 from sklearn.model_selection import train_test_split
+import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
 import os
  
+# TensorRT is optional: without it (or without a GPU) predictions run on Keras
+try:
+    import tensorrt as trt
+    import pycuda.driver as cuda
+except ImportError:
+    trt = None
+ 
+# Files derived from lstm_model.h5 by the export_* methods
+EXPORTED_MODELS = ['lstm_model.plan', 'lstm_model.tflite']
+ 
+# Bump when TRAINING_COLUMNS, TRAINING_DTYPES or the load_data/prepare_features
+# steps change, so features cached by train() are rebuilt
+FEATURE_VERSION = 1
+ 
+# Largest mean relative error from Keras accepted for the INT8 TF-Lite export
+TFLITE_MAX_ERROR = 0.05
+ 
+# Records converted to a DataFrame at a time by load_df
+LOAD_CHUNK_SIZE = 50000
+ 
+# Dataset columns used for training, with the dtypes of the numeric ones
+TRAINING_COLUMNS = [
+    'MANDAL', 'VILLAGE', 'WARD_NO', 'BLOCK_NO', 'DOOR_NO', 'COMM_RATE',
+    'COMP_FLOOR1', 'COMP_FLOOR_OTH', 'PRE_REV_UNIT_RATE', 'UNIT_RATE',
+    'EFFECTIVE_DATE'
+]
+TRAINING_DTYPES = {
+    'WARD_NO': 'float64',
+    'BLOCK_NO': 'float64',
+    'DOOR_NO': 'float64',
+    'COMM_RATE': 'float64',
+    'COMP_FLOOR1': 'float64',
+    'COMP_FLOOR_OTH': 'float64',
+    'PRE_REV_UNIT_RATE': 'float64',
+    'UNIT_RATE': 'float64'
+}
+ 
+def load_df(json_path, columns=None):
+    """Load dataset records into a DataFrame, streaming the JSON file in chunks"""
+    # Line-delimited records (one per line) parse fastest
+    if json_path.endswith('.jsonl'):
+        with pd.read_json(json_path, lines=True, dtype=False, chunksize=LOAD_CHUNK_SIZE) as reader:
+            chunks = [chunk if columns is None else chunk.reindex(columns=columns) for chunk in reader]
+    else:
+        # Otherwise stream the records out of {"data": [...]}, converting
+        # LOAD_CHUNK_SIZE at a time so only one chunk of dicts is held
+        chunks = []
+        with open(json_path, 'rb') as f:
+            records = ijson.items(f, 'data.item', use_float=True)
+            while True:
+                batch = list(itertools.islice(records, LOAD_CHUNK_SIZE))
+                if not batch:
+                    break
+                if columns is None:
+                    chunks.append(pd.DataFrame(batch))
+                else:
+                    chunks.append(pd.DataFrame.from_records(
+                        [tuple(r.get(c) for c in columns) for r in batch],
+                        columns=columns
+                    ))
+ 
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks, ignore_index=True)
+ 
 class PropertyPriceLSTM:
     def __init__(self):
         self.model = None
+        self._infer = None
         self.scaler = MinMaxScaler()
         self.mandal_encoder = LabelEncoder()
         self.village_encoder = LabelEncoder()
-        self.sequence_length = 10
+ 
+        # Label -> code lookups for the fitted encoders, used by predict()
+        self._mandal_map = {}
+        self._village_map = {}
+ 
+        # A sequence length of 1 trains a dense network on single records;
+        # longer sequences use the stacked LSTM
+        self.sequence_length = 1
+ 
+        # TensorRT engine state, populated by load_model when an engine exists
+        self._trt_engine = None
+        self._trt_context = None
+        self._trt_lock = threading.Lock()
+ 
+        # TF-Lite interpreter, used on CPU when a quantized model exists
+        self._tflite = None
+        self._tflite_lock = threading.Lock()
+ 
+        # Sample of training inputs used to calibrate INT8 quantization
+        self._calibration_data = None
  
     def load_data(self, json_path):
         """Load Tirupati dataset from JSON file"""
         print("Loading dataset...")
-        with open(json_path, 'r') as f:
-            data = json.load(f)
- 
-        df = pd.DataFrame(data['data'])
+        df = load_df(json_path, columns=TRAINING_COLUMNS).astype(TRAINING_DTYPES)
         print(f"Loaded {len(df)} records")
  
-        # Clean and prepare data
-        df = df[df['UNIT_RATE'] > 0].copy()  # Remove invalid rates
-        df['EFFECTIVE_DATE'] = pd.to_datetime(df['EFFECTIVE_DATE'])
+        # Clean and prepare data (ISO dates parse without per-row format inference)
+        df['EFFECTIVE_DATE'] = pd.to_datetime(df['EFFECTIVE_DATE'], format='ISO8601', cache=True)
  
-        # Sort by date for time series
-        df = df.sort_values('EFFECTIVE_DATE')
+        # Remove invalid rates and sort by date for time series
+        df = df.query('UNIT_RATE > 0').sort_values('EFFECTIVE_DATE', kind='stable')
  
         print(f"After cleaning: {len(df)} records")
         return df
@@ -44,6 +133,7 @@ class PropertyPriceLSTM:
         # Encode categorical features
         df['MANDAL_ENCODED'] = self.mandal_encoder.fit_transform(df['MANDAL'])
         df['VILLAGE_ENCODED'] = self.village_encoder.fit_transform(df['VILLAGE'])
+        self._build_encoder_maps()
  
         # Extract features
         features = df[[
@@ -67,52 +157,124 @@ class PropertyPriceLSTM:
         """Create time series sequences for LSTM"""
         print(f"Creating sequences with length {self.sequence_length}...")
  
-        X, y = [], []
-        for i in range(len(features) - self.sequence_length):
-            X.append(features[i:i + self.sequence_length])
-            y.append(target[i + self.sequence_length])
- 
-        X = np.array(X)
-        y = np.array(y)
+        # Window i covers rows i..i+L-1 and predicts the target at row i+L
+        windows = sliding_window_view(
+            features, (self.sequence_length, features.shape[1])
+        )[:, 0]
+        X = np.ascontiguousarray(windows[:-1])
+        y = np.asarray(target[self.sequence_length:])
  
         print(f"Created {len(X)} sequences")
         return X, y
  
-    def build_model(self, input_shape):
-        """Build LSTM model architecture"""
-        print("Building LSTM model...")
- 
-        model = Sequential([
-            LSTM(128, activation='relu', return_sequences=True, input_shape=input_shape),
-            Dropout(0.2),
-            LSTM(64, activation='relu', return_sequences=True),
-            Dropout(0.2),
-            LSTM(32, activation='relu'),
-            Dropout(0.2),
-            Dense(16, activation='relu'),
-            Dense(1)
-        ])
+    def _dataset_key(self, json_path):
+        """Identify a dataset file and feature version by path, size and modification time"""
+        stat = os.stat(json_path)
+        ident = f'{FEATURE_VERSION}:{os.path.abspath(json_path)}:{stat.st_size}:{stat.st_mtime_ns}'
+        return hashlib.sha1(ident.encode()).hexdigest()[:16]
+ 
+    def _save_feature_cache(self, cache_path, features_scaled, target):
+        """Save scaled features, target and fitted encoders for later runs"""
+        # Write into a temporary directory and move it into place, so an
+        # interrupted run never leaves a partial cache at cache_path
+        cache_dir = os.path.dirname(cache_path) or '.'
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+        try:
+            joblib.dump(self.scaler, f'{tmp_path}/scaler.joblib')
+            joblib.dump(self.mandal_encoder, f'{tmp_path}/mandal_encoder.joblib')
+            joblib.dump(self.village_encoder, f'{tmp_path}/village_encoder.joblib')
+            np.save(f'{tmp_path}/features.npy', features_scaled)
+            np.save(f'{tmp_path}/target.npy', target)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not cache features: {e}")
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+ 
+    def _load_feature_cache(self, cache_path):
+        """Memory-map cached features and target, or return None if not cached"""
+        if not os.path.isdir(cache_path):
+            return None
+ 
+        print(f"Using cached features from {cache_path}...")
+        self.scaler = joblib.load(f'{cache_path}/scaler.joblib')
+        self.mandal_encoder = joblib.load(f'{cache_path}/mandal_encoder.joblib')
+        self.village_encoder = joblib.load(f'{cache_path}/village_encoder.joblib')
+        self._build_encoder_maps()
+ 
+        features_scaled = np.load(f'{cache_path}/features.npy', mmap_mode='r')
+        target = np.load(f'{cache_path}/target.npy', mmap_mode='r')
+        return features_scaled, target
+ 
+    def build_model(self, input_shape, dtype='float32'):
+        """Build model architecture (dense for flat input, LSTM for sequences)"""
+        # With 'mixed_float16' layers compute in float16 while variables and
+        # the output layer stay float32
+        if len(input_shape) == 1:
+            print("Building dense model...")
+            model = Sequential([
+                Dense(128, activation='relu', input_shape=input_shape, dtype=dtype),
+                Dropout(0.2, dtype=dtype),
+                Dense(64, activation='relu', dtype=dtype),
+                Dense(32, activation='relu', dtype=dtype),
+                Dense(1, dtype='float32')
+            ])
+        else:
+            print("Building LSTM model...")
+            model = Sequential([
+                LSTM(128, activation='relu', return_sequences=True, input_shape=input_shape, dtype=dtype),
+                Dropout(0.2, dtype=dtype),
+                LSTM(64, activation='relu', return_sequences=True, dtype=dtype),
+                Dropout(0.2, dtype=dtype),
+                LSTM(32, activation='relu', dtype=dtype),
+                Dropout(0.2, dtype=dtype),
+                Dense(16, activation='relu', dtype=dtype),
+                Dense(1, dtype='float32')
+            ])
+ 
+        # Mixed precision needs loss scaling to keep float16 gradients from underflowing
+        optimizer = keras.optimizers.Adam()
+        if dtype == 'mixed_float16':
+            optimizer = keras.optimizers.LossScaleOptimizer(optimizer)
  
         model.compile(
-            optimizer='adam',
+            optimizer=optimizer,
             loss='mse',
-            metrics=['mae']
+            metrics=['mae'],
+            jit_compile=True
         )
  
         print(model.summary())
         return model
  
-    def train(self, json_path, epochs=50, batch_size=32):
+    def train(self, json_path, epochs=50, batch_size=32, cache_dir='ml-model/cache'):
         """Train the LSTM model"""
-        # Load and prepare data
-        df = self.load_data(json_path)
-        features, target = self.prepare_features(df)
- 
-        # Normalize features
-        features_scaled = self.scaler.fit_transform(features)
- 
-        # Create sequences
-        X, y = self.create_sequences(features_scaled, target)
+        # Reuse scaled features from an earlier run on the same dataset file
+        cache_path = None
+        cached = None
+        if cache_dir:
+            cache_path = os.path.join(cache_dir, self._dataset_key(json_path))
+            cached = self._load_feature_cache(cache_path)
+ 
+        if cached is not None:
+            features_scaled, target = cached
+        else:
+            # Load and prepare data
+            df = self.load_data(json_path)
+            features, target = self.prepare_features(df)
+ 
+            # Normalize features
+            features_scaled = self.scaler.fit_transform(features)
+ 
+            if cache_path:
+                self._save_feature_cache(cache_path, features_scaled, target)
+ 
+        # Create sequences (single records feed the dense model directly)
+        if self.sequence_length > 1:
+            X, y = self.create_sequences(features_scaled, target)
+        else:
+            X, y = features_scaled, target
  
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(
@@ -121,9 +283,11 @@ class PropertyPriceLSTM:
  
         print(f"Training set: {len(X_train)} samples")
         print(f"Test set: {len(X_test)} samples")
+        self._calibration_data = X_train[:100]
  
-        # Build model
-        self.model = self.build_model((X_train.shape[1], X_train.shape[2]))
+        # Build model (mixed precision on GPUs; float16 on CPU is slower)
+        dtype = 'mixed_float16' if tf.config.list_physical_devices('GPU') else 'float32'
+        self.model = self.build_model(X_train.shape[1:], dtype=dtype)
  
         # Early stopping
         early_stop = EarlyStopping(
@@ -149,49 +313,244 @@ class PropertyPriceLSTM:
         print(f"Test Loss: {test_loss:.2f}")
         print(f"Test MAE: {test_mae:.2f}")
  
+        # Save, export and serve a float32 copy; the weights are float32 either way
+        if dtype != 'float32':
+            trained = self.model
+            self.model = self.build_model(X_train.shape[1:])
+            self.model.set_weights(trained.get_weights())
+        self._build_infer()
+ 
         return history
  
     def predict(self, mandal, village, ward_no, block_no, door_no, comm_rate,
                 comp_floor1, comp_floor_oth, prev_rate):
         """Predict property price"""
+        return self.predict_batch([{
+            'mandal': mandal,
+            'village': village,
+            'ward_no': ward_no,
+            'block_no': block_no,
+            'door_no': door_no,
+            'comm_rate': comm_rate,
+            'comp_floor1': comp_floor1,
+            'comp_floor_oth': comp_floor_oth,
+            'prev_rate': prev_rate
+        }])[0]
+ 
+    def predict_batch(self, records):
+        """Predict prices for a list of predict() keyword dicts in one forward pass"""
         if self.model is None:
             raise Exception("Model not trained or loaded")
+        if not records:
+            return []
  
-        # Encode categorical features
-        try:
-            mandal_encoded = self.mandal_encoder.transform([mandal])[0]
-        except:
-            mandal_encoded = 0  # Default for unknown mandal
- 
-        try:
-            village_encoded = self.village_encoder.transform([village])[0]
-        except:
-            village_encoded = 0  # Default for unknown village
- 
-        # Prepare input features
+        # Prepare input features, encoding categoricals (0 for unknown mandal/village)
         features = np.array([[
-            mandal_encoded,
-            village_encoded,
-            ward_no,
-            block_no,
-            door_no,
-            comm_rate,
-            comp_floor1,
-            comp_floor_oth,
-            prev_rate
-        ]])
+            self._mandal_map.get(r['mandal'], 0),
+            self._village_map.get(r['village'], 0),
+            r['ward_no'],
+            r['block_no'],
+            r['door_no'],
+            r['comm_rate'],
+            r['comp_floor1'],
+            r['comp_floor_oth'],
+            r['prev_rate']
+        ] for r in records], dtype=np.float64)
  
         # Scale features
         features_scaled = self.scaler.transform(features)
  
-        # Create sequence (repeat for sequence length)
-        sequence = np.array([features_scaled] * self.sequence_length)
-        sequence = sequence.reshape(1, self.sequence_length, features.shape[1])
+        # Create sequences (repeat for sequence length on LSTM models)
+        if self.sequence_length > 1:
+            sequence = np.broadcast_to(
+                features_scaled[:, np.newaxis, :],
+                (len(records), self.sequence_length, features.shape[1])
+            ).copy()
+        else:
+            sequence = features_scaled
+ 
+        # Predict (the TensorRT engine is built for a batch of one)
+        if self._trt_context is not None:
+            predictions = [self._predict_trt(row[np.newaxis]) for row in sequence]
+        elif self._tflite is not None:
+            predictions = self._predict_tflite(sequence)
+        else:
+            predictions = self._infer(sequence.astype(np.float32)).numpy().ravel()
+ 
+        return [float(p) for p in predictions]
+ 
+    def _build_infer(self):
+        """Wrap the model call in an XLA-compiled tf.function traced once for any batch size"""
+        model = self.model
+        spec = tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)
+ 
+        # Used whenever neither TensorRT nor TF-Lite serves, e.g. GPU hosts
+        # without TensorRT; XLA fuses the layers into fewer kernels
+        @tf.function(input_signature=[spec], jit_compile=True)
+        def infer(x):
+            return model(x, training=False)
+ 
+        self._infer = infer
+ 
+    def _predict_trt(self, sequence):
+        """Run a single sequence through the TensorRT engine"""
+        with self._trt_lock:
+            self._cuda_ctx.push()
+            try:
+                np.copyto(self._h_in, sequence.reshape(self._h_in.shape), casting='unsafe')
+                cuda.memcpy_htod_async(self._d_in, self._h_in, self._trt_stream)
+                self._trt_context.execute_async_v3(self._trt_stream.handle)
+                cuda.memcpy_dtoh_async(self._h_out, self._d_out, self._trt_stream)
+                self._trt_stream.synchronize()
+                return self._h_out.ravel()[0]
+            finally:
+                self._cuda_ctx.pop()
+ 
+    def _predict_tflite(self, sequence):
+        """Run a batch of sequences through the TF-Lite interpreter in one invoke"""
+        with self._tflite_lock:
+            # Reallocate tensors only when the batch size changes
+            if len(sequence) != self._tflite_batch:
+                self._tflite.resize_tensor_input(self._tflite_in, sequence.shape)
+                self._tflite.allocate_tensors()
+                self._tflite_batch = len(sequence)
+ 
+            self._tflite.set_tensor(self._tflite_in, sequence.astype(np.float32))
+            self._tflite.invoke()
+            return self._tflite.get_tensor(self._tflite_out).ravel()
+ 
+    def export_tflite(self, path='ml-model/saved_models/lstm_model.tflite', repr_data=None,
+                      max_error=TFLITE_MAX_ERROR):
+        """Export the model as an INT8-quantized TF-Lite model if it stays close to Keras"""
+        if self.model is None:
+            raise Exception("Model not trained or loaded")
+ 
+        if repr_data is None:
+            repr_data = self._calibration_data
+        if repr_data is None:
+            raise Exception("Representative data is required for INT8 quantization")
+ 
+        def representative_dataset():
+            for i in range(min(len(repr_data), 100)):
+                yield [repr_data[i:i + 1].astype(np.float32)]
+ 
+        print(f"Exporting TF-Lite model to {path}...")
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        tflite_model = converter.convert()
+ 
+        # The output is the unscaled UNIT_RATE, so INT8 rounding can be large;
+        # compare against Keras on the calibration sample before writing
+        sample = np.asarray(repr_data[:100], dtype=np.float32)
+        interpreter = tf.lite.Interpreter(model_content=tflite_model)
+        input_index = interpreter.get_input_details()[0]['index']
+        interpreter.resize_tensor_input(input_index, sample.shape)
+        interpreter.allocate_tensors()
+        interpreter.set_tensor(input_index, sample)
+        interpreter.invoke()
+        quantized = interpreter.get_tensor(interpreter.get_output_details()[0]['index']).ravel()
+        expected = self._infer(sample).numpy().ravel()
+        error = np.mean(np.abs(quantized - expected) / np.maximum(np.abs(expected), 1.0))
+        print(f"TF-Lite mean relative error: {error:.4f}")
+        if error > max_error:
+            raise Exception(
+                f"TF-Lite relative error {error:.4f} exceeds {max_error}, not exporting"
+            )
+ 
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+ 
+        print("TF-Lite model exported successfully!")
+ 
+    def _load_tflite(self, path):
+        """Create a TF-Lite interpreter with its tensors allocated once"""
+        interpreter = tf.lite.Interpreter(model_path=path)
+        interpreter.allocate_tensors()
+        self._tflite_in = interpreter.get_input_details()[0]['index']
+        self._tflite_out = interpreter.get_output_details()[0]['index']
+        self._tflite_batch = interpreter.get_input_details()[0]['shape'][0]
+        self._tflite = interpreter
+ 
+    def export_trt(self, engine_path='ml-model/saved_models/lstm_model.plan'):
+        """Export the model as an FP16 TensorRT engine (see requirements-gpu.txt)"""
+        if self.model is None:
+            raise Exception("Model not trained or loaded")
+        if trt is None:
+            raise Exception("TensorRT is not installed")
+ 
+        import tf2onnx
  
-        # Predict
-        prediction = self.model.predict(sequence, verbose=0)[0][0]
+        print(f"Exporting TensorRT engine to {engine_path}...")
+        model = self.model
+        input_shape = (1,) + tuple(model.input_shape[1:])
+        spec = tf.TensorSpec(input_shape, tf.float32, name='input')
  
-        return float(prediction)
+        # from_keras does not support Keras 3 models, so convert the traced call
+        @tf.function(input_signature=[spec])
+        def forward(x):
+            return model(x, training=False)
+ 
+        onnx_model, _ = tf2onnx.convert.from_function(
+            forward,
+            input_signature=[spec],
+            opset=13
+        )
+ 
+        logger = trt.Logger(trt.Logger.WARNING)
+        builder = trt.Builder(logger)
+        network = builder.create_network(
+            1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
+        )
+        parser = trt.OnnxParser(network, logger)
+        if not parser.parse(onnx_model.SerializeToString()):
+            errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+            raise Exception(f"Failed to parse ONNX model: {errors}")
+ 
+        config = builder.create_builder_config()
+        config.set_flag(trt.BuilderFlag.FP16)
+        config.set_memory_pool_limit(trt.MemoryPoolType.WORKSPACE, 1 << 25)
+ 
+        engine = builder.build_serialized_network(network, config)
+        if engine is None:
+            raise Exception("Failed to build TensorRT engine")
+ 
+        os.makedirs(os.path.dirname(engine_path) or '.', exist_ok=True)
+        with open(engine_path, 'wb') as f:
+            f.write(engine)
+ 
+        print("TensorRT engine exported successfully!")
+ 
+    def _load_trt(self, engine_path):
+        """Deserialize a TensorRT engine and allocate its I/O buffers once"""
+        cuda.init()
+        self._cuda_ctx = cuda.Device(0).retain_primary_context()
+        self._cuda_ctx.push()
+        try:
+            logger = trt.Logger(trt.Logger.WARNING)
+            with open(engine_path, 'rb') as f:
+                engine = trt.Runtime(logger).deserialize_cuda_engine(f.read())
+            context = engine.create_execution_context()
+            self._trt_stream = cuda.Stream()
+ 
+            for i in range(engine.num_io_tensors):
+                name = engine.get_tensor_name(i)
+                shape = tuple(engine.get_tensor_shape(name))
+                dtype = trt.nptype(engine.get_tensor_dtype(name))
+                host = cuda.pagelocked_empty(shape, dtype)
+                device = cuda.mem_alloc(host.nbytes)
+                context.set_tensor_address(name, int(device))
+                if engine.get_tensor_mode(name) == trt.TensorIOMode.INPUT:
+                    self._h_in, self._d_in = host, device
+                else:
+                    self._h_out, self._d_out = host, device
+        finally:
+            self._cuda_ctx.pop()
+ 
+        self._trt_engine = engine
+        self._trt_context = context
  
     def save_model(self, model_dir='ml-model/saved_models'):
         """Save trained model and encoders"""
@@ -200,13 +559,18 @@ class PropertyPriceLSTM:
         print(f"Saving model to {model_dir}...")
         self.model.save(f'{model_dir}/lstm_model.h5')
  
+        # Exports of a previous model would otherwise keep being served
+        for name in EXPORTED_MODELS:
+            path = f'{model_dir}/{name}'
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+ 
         # Save scaler and encoders
-        with open(f'{model_dir}/scaler.pkl', 'wb') as f:
-            pickle.dump(self.scaler, f)
-        with open(f'{model_dir}/mandal_encoder.pkl', 'wb') as f:
-            pickle.dump(self.mandal_encoder, f)
-        with open(f'{model_dir}/village_encoder.pkl', 'wb') as f:
-            pickle.dump(self.village_encoder, f)
+        joblib.dump(self.scaler, f'{model_dir}/scaler.joblib', compress=3, protocol=5)
+        joblib.dump(self.mandal_encoder, f'{model_dir}/mandal_encoder.joblib', compress=3, protocol=5)
+        joblib.dump(self.village_encoder, f'{model_dir}/village_encoder.joblib', compress=3, protocol=5)
  
         print("Model saved successfully!")
  
@@ -214,17 +578,61 @@ class PropertyPriceLSTM:
         """Load trained model and encoders"""
         print(f"Loading model from {model_dir}...")
  
+        # Keep TensorFlow from reserving all GPU memory before the TensorRT engine loads
+        engine_path = f'{model_dir}/lstm_model.plan'
+        if trt is not None and os.path.exists(engine_path):
+            for gpu in tf.config.list_physical_devices('GPU'):
+                try:
+                    tf.config.experimental.set_memory_growth(gpu, True)
+                except RuntimeError as e:
+                    print(f"Could not enable GPU memory growth: {e}")
+ 
         self.model = keras.models.load_model(f'{model_dir}/lstm_model.h5')
  
-        with open(f'{model_dir}/scaler.pkl', 'rb') as f:
-            self.scaler = pickle.load(f)
-        with open(f'{model_dir}/mandal_encoder.pkl', 'rb') as f:
-            self.mandal_encoder = pickle.load(f)
-        with open(f'{model_dir}/village_encoder.pkl', 'rb') as f:
-            self.village_encoder = pickle.load(f)
+        # Models saved before the dense architecture expect (batch, steps, features)
+        input_shape = self.model.input_shape
+        self.sequence_length = input_shape[1] if len(input_shape) == 3 else 1
+        self._build_infer()
+ 
+        self.scaler = self._load_artifact(model_dir, 'scaler')
+        self.mandal_encoder = self._load_artifact(model_dir, 'mandal_encoder')
+        self.village_encoder = self._load_artifact(model_dir, 'village_encoder')
+        self._build_encoder_maps()
+ 
+        # Prefer the TensorRT engine when one was exported and TensorRT is usable
+        if trt is not None and os.path.exists(engine_path):
+            try:
+                self._load_trt(engine_path)
+                print("Using TensorRT engine for inference")
+            except Exception as e:
+                print(f"Could not load TensorRT engine, using Keras: {e}")
+ 
+        # Otherwise use the quantized TF-Lite model on CPU-only hosts
+        tflite_path = f'{model_dir}/lstm_model.tflite'
+        if (self._trt_context is None and os.path.exists(tflite_path)
+                and not tf.config.list_physical_devices('GPU')):
+            try:
+                self._load_tflite(tflite_path)
+                print("Using TF-Lite model for inference")
+            except Exception as e:
+                print(f"Could not load TF-Lite model, using Keras: {e}")
  
         print("Model loaded successfully!")
  
+    def _build_encoder_maps(self):
+        """Build dict lookups from the fitted label encoders"""
+        self._mandal_map = {c: i for i, c in enumerate(self.mandal_encoder.classes_)}
+        self._village_map = {c: i for i, c in enumerate(self.village_encoder.classes_)}
+ 
+    def _load_artifact(self, model_dir, name):
+        """Load a fitted scaler/encoder, falling back to the older pickle files"""
+        path = f'{model_dir}/{name}.joblib'
+        if os.path.exists(path):
+            return joblib.load(path)
+ 
+        with open(f'{model_dir}/{name}.pkl', 'rb') as f:
+            return pickle.load(f)
+ 
 if __name__ == '__main__':
     # Train the model
     lstm_model = PropertyPriceLSTM()
@@ -238,4 +646,14 @@ if __name__ == '__main__':
     # Save model
     lstm_model.save_model()
  
+    # Export quantized TF-Lite model for CPU inference
+    try:
+        lstm_model.export_tflite()
+    except Exception as e:
+        print(f"Skipping TF-Lite export: {e}")
+ 
+    # Export TensorRT engine for GPU inference
+    if trt is not None:
+        lstm_model.export_trt()
+ 
     print("\n✅ Model training complete!")
\ No newline at end of file
@@ -1,31 +1,204 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import json
+from flask_caching import Cache
+from jsonschema import Draft7Validator, ValidationError
 import os
-from lstm_model import PropertyPriceLSTM
+import re
+import threading
+import numpy as np
+import orjson
+import pandas as pd
+from lstm_model import PropertyPriceLSTM, load_df
+ 
+class ORJSONProvider(JSONProvider):
+    """Parse request bodies and encode responses with orjson"""
+    option = orjson.OPT_SERIALIZE_NUMPY
+ 
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+ 
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+ 
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype='application/json'
+        )
  
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
  
+# Cache predictions and location searches for 15 minutes
+cache = Cache(app, config={
+    'CACHE_TYPE': 'SimpleCache',
+    'CACHE_DEFAULT_TIMEOUT': 900
+})
+ 
 # Load the trained model
 lstm_model = PropertyPriceLSTM()
 model_loaded = False
  
+# Process that loaded the model; TensorFlow state does not survive fork, so
+# each worker loads its own copy the first time init_model runs in it
+_model_pid = None
+_model_lock = threading.Lock()
+ 
 # Load Tirupati dataset for reference
 dataset_path = '../src/data/tirupatidataset_with_location.json'
-tirupati_data = []
+tirupati_df = pd.DataFrame()
+ 
+# Rate columns averaged over similar properties, with the value assumed
+# when a record does not carry the field
+RATE_DEFAULTS = {
+    'COMM_RATE': 3000,
+    'COMP_FLOOR1': 3500,
+    'COMP_FLOOR_OTH': 3200,
+    'PRE_REV_UNIT_RATE': 40000,
+    'UNIT_RATE': 40000
+}
+RATE_COLUMNS = list(RATE_DEFAULTS)
+ 
+# Text columns read per request, with the value assumed when missing
+TEXT_DEFAULTS = {
+    'MANDAL': '',
+    'VILLAGE': '',
+    'DISTRICT': '',
+    'TR_DOOR_NO': ''
+}
+ 
+# Dataset fields loaded by load_dataset; missing fields load as null
+DATASET_COLUMNS = list(TEXT_DEFAULTS) + RATE_COLUMNS
+ 
+# Largest number of properties accepted by /api/predict-batch
+MAX_BATCH_SIZE = 256
+ 
+# Prediction input for one property; omitted (or null) fields take their default
+PROPERTY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'district': {'type': ['string', 'null'], 'default': 'Tirupati'},
+        'mandal': {'type': ['string', 'null'], 'default': 'Tirupati Urban'},
+        'village': {'type': ['string', 'null'], 'default': 'Tirupathi'},
+        'tr_door_no': {'type': ['string', 'null'], 'default': ''},
+        'area': {'type': ['number', 'null'], 'default': 1000},  # in sq ft
+        'propertyType': {'type': ['string', 'null'], 'default': 'RESIDENTIAL'}
+    }
+}
+INPUT_DEFAULTS = [(name, spec['default']) for name, spec in PROPERTY_SCHEMA['properties'].items()]
+ 
+# Validators are compiled once at import
+property_validator = Draft7Validator(PROPERTY_SCHEMA)
+batch_validator = Draft7Validator({
+    'type': 'object',
+    'properties': {
+        'properties': {'type': 'array', 'items': PROPERTY_SCHEMA, 'maxItems': MAX_BATCH_SIZE}
+    }
+})
+ 
+# TR_DOOR_NO format: WARD-BLOCK-DOOR/BI
+DOOR_NO_RE = re.compile(r'^(\d+)-(\d+)-(\d+)')
+ 
+# Fields shown for comparable properties, in the order comparable_properties() unpacks them
+COMPARABLE_COLUMNS = ('TR_DOOR_NO', 'VILLAGE', 'MANDAL', 'DISTRICT', 'UNIT_RATE', 'COMM_RATE')
+ 
+# Columnar (one array per field) copies of COMPARABLE_COLUMNS
+_cols = {}
+ 
+# Per-location aggregates and row positions (int32 arrays), precomputed
+# once so requests only do dict lookups
+_mv_stats = {}
+_mv_index = {}
+_m_stats = {}
+_m_index = {}
+ 
+# (average rates, record count, comparable properties) for unknown locations
+_fallback = (dict(RATE_DEFAULTS), 0, [])
+ 
+# Sorted (name, lowercase name) pairs for location search
+_mandals_sorted = ()
+_villages_sorted = ()
  
 def load_dataset():
     """Load dataset for lookup and reference"""
-    global tirupati_data
+    global tirupati_df, _cols
+    global _mv_stats, _mv_index, _m_stats, _m_index, _fallback
+    global _mandals_sorted, _villages_sorted
     print("Loading Tirupati dataset...")
-    with open(dataset_path, 'r') as f:
-        data = json.load(f)
-        tirupati_data = data['data']
-    print(f"Loaded {len(tirupati_data)} records")
+    tirupati_df = load_df(dataset_path, columns=DATASET_COLUMNS)
+    for col, default in RATE_DEFAULTS.items():
+        tirupati_df[col] = tirupati_df[col].astype('float64').fillna(default)
+ 
+    _cols = {col: tirupati_df[col].to_numpy() for col in ('UNIT_RATE', 'COMM_RATE')}
+    for col, default in TEXT_DEFAULTS.items():
+        _cols[col] = tirupati_df[col].fillna(default).to_numpy()
+ 
+    # Aggregate rates by (mandal, village) and by mandal alone
+    by_location = tirupati_df.groupby(['MANDAL', 'VILLAGE'], sort=False)
+    _mv_stats = by_location[RATE_COLUMNS].mean().to_dict('index')
+    _mv_index = {key: rows.astype(np.int32) for key, rows in by_location.indices.items()}
+ 
+    by_mandal = tirupati_df.groupby('MANDAL', sort=False)
+    _m_stats = by_mandal[RATE_COLUMNS].mean().to_dict('index')
+    _m_index = {key: rows.astype(np.int32) for key, rows in by_mandal.indices.items()}
+ 
+    # Fallback to first 100 records for unknown locations
+    fallback_rows = np.arange(min(len(tirupati_df), 100), dtype=np.int32)
+    _fallback = (dict(RATE_DEFAULTS), 0, [])
+    if len(fallback_rows):
+        rates = tirupati_df[RATE_COLUMNS].iloc[fallback_rows].to_numpy(dtype=np.float64)
+        fallback_rates = dict(zip(RATE_COLUMNS, rates.mean(axis=0).tolist()))
+        _fallback = (fallback_rates, len(fallback_rows), comparable_properties(fallback_rows))
+ 
+    _mandals_sorted = tuple((m, m.lower()) for m in sorted(tirupati_df['MANDAL'].unique()))
+    _villages_sorted = tuple((v, v.lower()) for v in sorted(tirupati_df['VILLAGE'].unique()))
+ 
+    print(f"Loaded {len(tirupati_df)} records")
+ 
+def location_stats(mandal, village):
+    """Return (average rates, matching record count, comparable properties) for a location"""
+    rows = _mv_index.get((mandal, village))
+    if rows is not None:
+        return _mv_stats[(mandal, village)], len(rows), comparable_properties(rows)
+ 
+    rows = _m_index.get(mandal)
+    if rows is not None:
+        return _m_stats[mandal], len(rows), comparable_properties(rows)
+ 
+    return _fallback
+ 
+def comparable_properties(rows):
+    """Format the first five matching records as comparable properties"""
+    rows = rows[:5]
+    fields = zip(*(_cols[col][rows].tolist() for col in COMPARABLE_COLUMNS))
+    return [{
+        'propertyId': door_no,
+        'location': f"{village}, {mandal}",
+        'district': district,
+        'mandal': mandal,
+        'tr_door_no': door_no,
+        'unit_rate': unit_rate,
+        'comm_rate': comm_rate
+    } for door_no, village, mandal, district, unit_rate, comm_rate in fields]
  
 def init_model():
-    """Initialize the LSTM model"""
+    """Initialize the LSTM model once per process"""
+    global model_loaded, _model_pid
+    if _model_pid == os.getpid():
+        return
+    with _model_lock:
+        if _model_pid == os.getpid():
+            return
+        model_loaded = False
+        load_lstm_model()
+        _model_pid = os.getpid()
+ 
+def load_lstm_model():
+    """Load the trained LSTM model into lstm_model"""
     global model_loaded
     try:
         if os.path.exists('saved_models/lstm_model.h5'):
@@ -37,136 +210,177 @@ def init_model():
     except Exception as e:
         print(f"❌ Error loading model: {e}")
  
+@app.before_request
+def ensure_model():
+    """Load the model in this process before its first request"""
+    init_model()
+ 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'ok',
         'model_loaded': model_loaded,
-        'dataset_records': len(tirupati_data)
+        'dataset_records': len(tirupati_df)
     })
  
+def extract_inputs(data):
+    """Extract validated prediction inputs from a request body, applying defaults"""
+    return tuple(default if data.get(name) is None else data[name]
+                 for name, default in INPUT_DEFAULTS)
+ 
+def validation_message(error):
+    """Describe a schema validation error without echoing large request bodies"""
+    if error.validator == 'maxItems':
+        return f'At most {MAX_BATCH_SIZE} properties per batch'
+    return error.message
+ 
+def prepare_prediction(mandal, village, tr_door_no):
+    """Build model features and location rates for a property"""
+    # Parse TR_DOOR_NO (format: WARD-BLOCK-DOOR/BI)
+    match = DOOR_NO_RE.match(tr_door_no)
+    ward_no, block_no, door_no = map(int, match.groups()) if match else (1, 1, 1)
+ 
+    # Look up average rates from similar properties
+    location = location_stats(mandal, village)
+    avg_rates = location[0]
+ 
+    features = {
+        'mandal': mandal,
+        'village': village,
+        'ward_no': ward_no,
+        'block_no': block_no,
+        'door_no': door_no,
+        'comm_rate': avg_rates['COMM_RATE'],
+        'comp_floor1': avg_rates['COMP_FLOOR1'],
+        'comp_floor_oth': avg_rates['COMP_FLOOR_OTH'],
+        'prev_rate': avg_rates['PRE_REV_UNIT_RATE']
+    }
+ 
+    return features, location
+ 
+def build_result(inputs, features, location, predicted_unit_rate):
+    """Assemble the prediction response for a property"""
+    district, mandal, village, tr_door_no, area, property_type = inputs
+    avg_rates, match_count, comparables = location
+    avg_comm_rate = features['comm_rate']
+ 
+    # Calculate total price based on area
+    price_per_sqft = predicted_unit_rate
+    if property_type == 'COMMERCIAL':
+        price_per_sqft = avg_comm_rate
+    elif property_type == 'RESIDENTIAL':
+        price_per_sqft = predicted_unit_rate
+ 
+    total_price = price_per_sqft * area
+ 
+    # Calculate confidence based on similar properties
+    confidence = 'HIGH' if match_count > 50 else 'MEDIUM' if match_count > 10 else 'LOW'
+ 
+    # Price range (±8-12% based on confidence)
+    variance = 0.08 if confidence == 'HIGH' else 0.10 if confidence == 'MEDIUM' else 0.12
+    price_range = {
+        'min': int(total_price * (1 - variance)),
+        'max': int(total_price * (1 + variance))
+    }
+ 
+    return {
+        'predictedPrice': int(total_price),
+        'priceRange': price_range,
+        'pricePerSqFt': int(price_per_sqft),
+        'confidence': confidence,
+        'dataPoints': match_count,
+        'modelUsed': 'LSTM' if model_loaded else 'AVERAGE',
+        'factors': {
+            'district': district,
+            'mandal': mandal,
+            'village': village,
+            'tr_door_no': tr_door_no,
+            'area': area,
+            'propertyType': property_type,
+            'ward_no': features['ward_no'],
+            'block_no': features['block_no'],
+            'door_no': features['door_no'],
+            'avgCommRate': int(avg_comm_rate),
+            'avgFloor1': int(features['comp_floor1']),
+            'avgFloorOth': int(features['comp_floor_oth']),
+            'locationMatches': match_count
+        },
+        'comparableProperties': comparables
+    }
+ 
 @app.route('/api/predict', methods=['POST'])
 def predict_price():
     """Predict property price using LSTM model"""
     try:
-        data = request.json
- 
-        # Extract input fields
-        district = data.get('district', 'Tirupati')
-        mandal = data.get('mandal', 'Tirupati Urban')
-        village = data.get('village', 'Tirupathi')
-        tr_door_no = data.get('tr_door_no', '')
-        area = data.get('area', 1000)  # in sq ft
-        property_type = data.get('propertyType', 'RESIDENTIAL')
- 
-        # Parse TR_DOOR_NO (format: WARD-BLOCK-DOOR/BI)
-        ward_no, block_no, door_no = 1, 1, 1
-        if tr_door_no:
-            try:
-                parts = tr_door_no.split('/')
-                ward_block_door = parts[0].split('-')
-                ward_no = int(ward_block_door[0])
-                block_no = int(ward_block_door[1])
-                door_no = int(ward_block_door[2])
-            except:
-                pass
- 
-        # Find similar properties in dataset for comm_rate and floor rates
-        similar_props = [p for p in tirupati_data
-                         if p['MANDAL'] == mandal and p['VILLAGE'] == village]
- 
-        if not similar_props:
-            similar_props = [p for p in tirupati_data if p['MANDAL'] == mandal]
- 
-        if not similar_props:
-            similar_props = tirupati_data[:100]  # Fallback to first 100 records
- 
-        # Calculate average rates from similar properties
-        avg_comm_rate = sum(p.get('COMM_RATE', 3000) for p in similar_props) / len(similar_props)
-        avg_floor1 = sum(p.get('COMP_FLOOR1', 3500) for p in similar_props) / len(similar_props)
-        avg_floor_oth = sum(p.get('COMP_FLOOR_OTH', 3200) for p in similar_props) / len(similar_props)
-        avg_prev_rate = sum(p.get('PRE_REV_UNIT_RATE', 40000) for p in similar_props) / len(similar_props)
+        data = request.get_json(silent=True)
+        property_validator.validate(data)
+ 
+        result = compute_prediction(*extract_inputs(data))
+        return jsonify(result)
+ 
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': validation_message(e)
+        }), 400
+ 
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+ 
+@cache.memoize()
+def compute_prediction(district, mandal, village, tr_door_no, area, property_type):
+    """Compute the prediction result for a set of inputs (memoized)"""
+    features, location = prepare_prediction(mandal, village, tr_door_no)
+ 
+    if model_loaded:
+        # Use LSTM model for prediction
+        predicted_unit_rate = lstm_model.predict(**features)
+    else:
+        # Fallback: Use average from similar properties
+        predicted_unit_rate = location[0]['UNIT_RATE']
+ 
+    inputs = (district, mandal, village, tr_door_no, area, property_type)
+    return {
+        'success': True,
+        'data': build_result(inputs, features, location, predicted_unit_rate)
+    }
+ 
+@app.route('/api/predict-batch', methods=['POST'])
+def predict_batch():
+    """Predict prices for a list of properties with one model pass"""
+    try:
+        data = request.get_json(silent=True)
+        batch_validator.validate(data)
+ 
+        properties = data.get('properties', [])
+        inputs = [extract_inputs(p) for p in properties]
+        prepared = [prepare_prediction(mandal, village, tr_door_no)
+                    for _, mandal, village, tr_door_no, _, _ in inputs]
  
         if model_loaded:
-            # Use LSTM model for prediction
-            predicted_unit_rate = lstm_model.predict(
-                mandal=mandal,
-                village=village,
-                ward_no=ward_no,
-                block_no=block_no,
-                door_no=door_no,
-                comm_rate=avg_comm_rate,
-                comp_floor1=avg_floor1,
-                comp_floor_oth=avg_floor_oth,
-                prev_rate=avg_prev_rate
-            )
+            # Use LSTM model for all properties at once
+            rates = lstm_model.predict_batch([features for features, _ in prepared])
         else:
             # Fallback: Use average from similar properties
-            avg_unit_rate = sum(p.get('UNIT_RATE', 40000) for p in similar_props) / len(similar_props)
-            predicted_unit_rate = avg_unit_rate
+            rates = [location[0]['UNIT_RATE'] for _, location in prepared]
  
-        # Calculate total price based on area
-        price_per_sqft = predicted_unit_rate
-        if property_type == 'COMMERCIAL':
-            price_per_sqft = avg_comm_rate
-        elif property_type == 'RESIDENTIAL':
-            price_per_sqft = predicted_unit_rate
- 
-        total_price = price_per_sqft * area
- 
-        # Calculate confidence based on similar properties
-        confidence = 'HIGH' if len(similar_props) > 50 else 'MEDIUM' if len(similar_props) > 10 else 'LOW'
- 
-        # Price range (±8-12% based on confidence)
-        variance = 0.08 if confidence == 'HIGH' else 0.10 if confidence == 'MEDIUM' else 0.12
-        price_range = {
-            'min': int(total_price * (1 - variance)),
-            'max': int(total_price * (1 + variance))
-        }
- 
-        # Get comparable properties
-        comparable_properties = []
-        for prop in similar_props[:5]:
-            comparable_properties.append({
-                'propertyId': prop.get('TR_DOOR_NO', ''),
-                'location': f"{prop.get('VILLAGE', '')}, {prop.get('MANDAL', '')}",
-                'district': prop.get('DISTRICT', ''),
-                'mandal': prop.get('MANDAL', ''),
-                'tr_door_no': prop.get('TR_DOOR_NO', ''),
-                'unit_rate': prop.get('UNIT_RATE', 0),
-                'comm_rate': prop.get('COMM_RATE', 0)
-            })
- 
-        result = {
+        return jsonify({
             'success': True,
-            'data': {
-                'predictedPrice': int(total_price),
-                'priceRange': price_range,
-                'pricePerSqFt': int(price_per_sqft),
-                'confidence': confidence,
-                'dataPoints': len(similar_props),
-                'modelUsed': 'LSTM' if model_loaded else 'AVERAGE',
-                'factors': {
-                    'district': district,
-                    'mandal': mandal,
-                    'village': village,
-                    'tr_door_no': tr_door_no,
-                    'area': area,
-                    'propertyType': property_type,
-                    'ward_no': ward_no,
-                    'block_no': block_no,
-                    'door_no': door_no,
-                    'avgCommRate': int(avg_comm_rate),
-                    'avgFloor1': int(avg_floor1),
-                    'avgFloorOth': int(avg_floor_oth),
-                    'locationMatches': len(similar_props)
-                },
-                'comparableProperties': comparable_properties
-            }
-        }
+            'data': [
+                build_result(i, features, location, rate)
+                for i, (features, location), rate in zip(inputs, prepared, rates)
+            ]
+        })
  
-        return jsonify(result)
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': validation_message(e)
+        }), 400
  
     except Exception as e:
         return jsonify({
@@ -180,21 +394,9 @@ def search_locations():
     try:
         query = request.args.get('q', '').lower()
  
-        # Get unique locations
-        mandals = list(set(p['MANDAL'] for p in tirupati_data))
-        villages = list(set(p['VILLAGE'] for p in tirupati_data))
- 
-        # Filter based on query
-        if query:
-            mandals = [m for m in mandals if query in m.lower()]
-            villages = [v for v in villages if query in v.lower()]
- 
         return jsonify({
             'success': True,
-            'data': {
-                'mandals': sorted(mandals)[:20],
-                'villages': sorted(villages)[:20]
-            }
+            'data': find_locations(query)
         })
  
     except Exception as e:
@@ -203,10 +405,25 @@ def search_locations():
             'error': str(e)
         }), 500
  
-if __name__ == '__main__':
-    # Load dataset
-    load_dataset()
+@cache.memoize()
+def find_locations(query):
+    """Find mandals and villages matching a lowercase query (memoized)"""
+    # Names are presorted, so the first 20 matches are already in order
+    mandals = [m for m, lower in _mandals_sorted if query in lower][:20]
+    villages = [v for v, lower in _villages_sorted if query in lower][:20]
+ 
+    return {
+        'mandals': mandals,
+        'villages': villages
+    }
  
+# Load the dataset on import, so `gunicorn --preload` (see gunicorn.conf.py)
+# loads it once in the master and workers share it copy-on-write. The model
+# is loaded per worker after fork, since TensorFlow and CUDA state do not
+# survive fork.
+load_dataset()
+ 
+if __name__ == '__main__':
     # Initialize model
     init_model()
  
@@ -215,13 +432,14 @@ if __name__ == '__main__':
     print('🚀 LSTM Price Prediction API Starting...')
     print('=' * 60)
     print(f'📍 URL: http://localhost:5000')
-    print(f'📊 Dataset: {len(tirupati_data)} Tirupati records')
+    print(f'📊 Dataset: {len(tirupati_df)} Tirupati records')
     print(f'🤖 Model Status: {"Loaded" if model_loaded else "Not Loaded (using fallback)"}')
     print('=' * 60)
     print('\nAvailable endpoints:')
     print('  GET    /health')
     print('  POST   /api/predict')
+    print('  POST   /api/predict-batch')
     print('  GET    /api/search-locations')
     print('=' * 60 + '\n')
  
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file